@@ -1,16 +1,20 @@
 from __future__ import annotations
 
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+import os
 import re
+import time
 from io import BytesIO
 from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 import streamlit as st
 
-from src.doi_validate import validate_doi_http
-from src.metadata import crossref_title_by_doi, title_match_score, title_match_label
+from src.doi_validate import LRUCache, make_doi_session, validate_doi_http
+from src.metadata import crossref_title_by_doi, crossref_titles_for_dois, title_match_score
 from src.reporting import to_dataframe, make_txt_report
 from src.doi_extract import clean_doi, is_valid_doi_format
 
@@ -19,7 +23,7 @@ from documento import (
     figshare_list_theses,
     figshare_article_detail,
     figshare_extract_pdf_urls,
-    figshare_download_pdf_bytes,
+    figshare_download_pdf_file,
     process_pdf_bytes_to_doi_rows,
     extract_dois_robust,
 )
@@ -46,13 +50,24 @@ STATUS_COLORS = {
 }
 TITLE_MATCH_COLORS = {"coincide": PALETTE["morado"], "no_coincide": PALETTE["azul"], "desconocido": PALETTE["celeste"]}
 PAGE_FONT = "Inter, Source Sans Pro, sans-serif"
-
-
-def _safe_int(x) -> int:
-    try:
-        return int(x)
-    except Exception:
-        return 0
+PROGRESS_INTERVAL = 0.1  # segundos mínimos entre refrescos de progreso
+FIGSHARE_DETAIL_CACHE_SIZE = 200
+FIGSHARE_PDF_CACHE_SIZE = 50
+DOI_CACHE_SIZE = 10_000
+
+
+# Columnas auxiliares: (columna de resultados, campo en dois_info, valor por defecto)
+_AUX_COLUMNS = (
+    ("Archivo", "file_name", "N/A"),
+    ("Página", "page", "N/A"),
+    ("Patrón", "pattern", ""),
+    ("Contexto", "context", ""),
+    ("Referencia (línea)", "reference_line", ""),
+    ("Título (Bibliografía)", "bib_title", ""),
+    ("Figshare ID", "figshare_id", ""),
+    ("Figshare URL", "figshare_url", ""),
+    ("PDF URL", "pdf_url", ""),
+)
 
 
 def _apply_layout(fig: go.Figure, titulo: str = "", titulo_x: str = "", titulo_y: str = "", altura: int = 360):
@@ -72,15 +87,17 @@ def _apply_layout(fig: go.Figure, titulo: str = "", titulo_x: str = "", titulo_y
 
 
 def _dedupe_dois(dois_info: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    seen = set()
-    out = []
-    for d in sorted(dois_info, key=lambda x: x.get("position", 0)):
+    # Una sola pasada: por DOI se conserva la aparición de menor posición
+    best: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+    for d in dois_info:
         k = (d.get("doi") or "").lower()
-        if not k or k in seen:
+        if not k:
             continue
-        out.append(d)
-        seen.add(k)
-    return out
+        pos = d.get("position", 0)
+        cur = best.get(k)
+        if cur is None or pos < cur[0]:
+            best[k] = (pos, d)
+    return [v[1] for v in sorted(best.values(), key=lambda x: x[0])]
 
 
 def _parse_pasted_dois(text: str) -> List[Dict[str, Any]]:
@@ -100,6 +117,124 @@ def _parse_pasted_dois(text: str) -> List[Dict[str, Any]]:
     return rows
 
 
+# Patrones precompilados para extract_title_by_style (se ejecuta una vez por DOI)
+_APA_RE1 = re.compile(r'\(\d{4}[a-z]?\)\.\s*(.+?)\.(?:\s+[A-Z]|\s+http|$)', re.IGNORECASE)
+_APA_RE2 = re.compile(r'\(\d{4}[a-z]?\)\.\s*(.+?)(?:\s+Vol\.|\s+pp\.|\s+\d+\(|\.|http)', re.IGNORECASE)
+_IEEE_QUOTE_RE = re.compile(r'"([^"]+)"')
+_IEEE_COMMA_RE = re.compile(r',\s+([^,]+?),\s+(?:vol\.|in\s+)', re.IGNORECASE)
+_MLA_CAPS_RE = re.compile(r'(?:^|\.\s+)([A-Z][^.]+?)\.\s+[A-Z]')
+_CHICAGO_RE = re.compile(r'\d{4}\.\s*(.+?)\.(?:\s+[A-Z]|$)')
+_YEAR_PREFIX_RE = re.compile(r'^\d{4}')
+_URL_RE = re.compile(r'https?://\S+')
+_DOI_RE = re.compile(r'doi:\s*\S+', re.IGNORECASE)
+
+
+def _strip_urls_dois(title: str) -> str:
+    # La mayoría de títulos no traen URL/DOI: solo se aplica el regex si hay indicios
+    if 'http' in title:
+        title = _URL_RE.sub('', title)
+    if 'doi' in title.lower():
+        title = _DOI_RE.sub('', title)
+    return title
+
+
+# APA 7: Autor(es). (Año). Título en cursiva. Revista/Editorial.
+# Patrón: después de (año) buscar texto hasta punto o revista
+def _extract_apa(ref: str) -> str:
+    # Buscar patrón (año). Título
+    match = _APA_RE1.search(ref)
+    if match:
+        # Limpiar posibles URLs y DOIs del título (un solo strip al final)
+        return _strip_urls_dois(match.group(1)).strip()
+
+    # Patrón alternativo: buscar después de año hasta Vol., pp., o revista
+    match = _APA_RE2.search(ref)
+    if match:
+        return _strip_urls_dois(match.group(1)).strip()
+    return ""
+
+
+# IEEE: [#] Autor(es), "Título entre comillas," Revista, vol., no., pp., año.
+def _extract_ieee(ref: str) -> str:
+    # Buscar texto entre comillas
+    match = _IEEE_QUOTE_RE.search(ref)
+    if match:
+        return match.group(1).strip()
+
+    # Si no hay comillas, buscar después de coma y antes de revista/vol
+    match = _IEEE_COMMA_RE.search(ref)
+    if match:
+        return match.group(1).strip()
+    return ""
+
+
+# MLA: Autor(es). "Título." Revista, vol., no., año, pp.
+def _extract_mla(ref: str) -> str:
+    # Buscar texto entre comillas
+    match = _IEEE_QUOTE_RE.search(ref)
+    if match:
+        return match.group(1).strip()
+
+    # Buscar título en cursiva (después de autores)
+    match = _MLA_CAPS_RE.search(ref)
+    if match:
+        return match.group(1).strip()
+    return ""
+
+
+# Chicago: Autor(es). Año. Título. Editorial o Revista.
+def _extract_chicago(ref: str) -> str:
+    # Buscar después de año hasta punto
+    match = _CHICAGO_RE.search(ref)
+    if match:
+        return _strip_urls_dois(match.group(1)).strip()
+    return ""
+
+
+# Vancouver: Autor(es). Título. Revista. Año;vol(no):pp.
+def _extract_vancouver(ref: str) -> str:
+    # Buscar título entre primer y segundo punto después de autores
+    parts = ref.split('.', 2)  # solo se usan autores, título y el resto
+    if len(parts) >= 3:
+        # Típicamente: [0]=autores, [1]=título, [2]=revista
+        title = parts[1].strip()
+        if title and not _YEAR_PREFIX_RE.match(title):  # No es un año
+            title = _strip_urls_dois(title)
+            return title.strip()
+    return ""
+
+
+# Auto (fallback): intentar cada método en orden de probabilidad
+_AUTO_EXTRACTORS = (_extract_apa, _extract_ieee, _extract_mla, _extract_vancouver, _extract_chicago)
+# Referencias numeradas tipo "[12] ..." son casi siempre IEEE: probarlo primero
+_AUTO_EXTRACTORS_IEEE = (_extract_ieee, _extract_apa, _extract_mla, _extract_vancouver, _extract_chicago)
+
+
+def _extract_auto(ref: str) -> str:
+    extractors = _AUTO_EXTRACTORS_IEEE if ref.startswith('[') and ']' in ref[:8] else _AUTO_EXTRACTORS
+    for fn in extractors:
+        title = fn(ref)
+        if title and len(title) > 10:  # Título razonable encontrado
+            return title
+    return ""
+
+
+_STYLE_EXTRACTORS = {
+    "APA 7": _extract_apa,
+    "IEEE": _extract_ieee,
+    "MLA": _extract_mla,
+    "Chicago": _extract_chicago,
+    "Vancouver": _extract_vancouver,
+}
+
+
+@lru_cache(maxsize=4096)
+def _extract_title_cached(ref: str, style: str) -> str:
+    # Varias filas suelen compartir la misma línea de referencia: memoizar por (ref, estilo)
+    fn = _STYLE_EXTRACTORS.get(style)
+    return fn(ref) if fn else _extract_auto(ref)
+
+
 def extract_title_by_style(reference: str, style: str) -> str:
     """
     Extrae el título de una referencia bibliográfica según el estilo de citación.
@@ -110,87 +245,12 @@ def extract_title_by_style(reference: str, style: str) -> str:
     - MLA: Título en cursiva después de autores
     - Chicago: Título en cursiva después de autores y año
     - Vancouver: Título después de autores, termina en punto
+    Cualquier otro valor (p.ej. "Auto (detectar)") prueba los estilos en orden.
     """
-    if not reference or not reference.strip():
+    ref = reference.strip() if reference else ""
+    if not ref:
         return ""
-    
-    ref = reference.strip()
-    
-    # APA 7: Autor(es). (Año). Título en cursiva. Revista/Editorial.
-    # Patrón: después de (año) buscar texto hasta punto o revista
-    if style == "APA 7":
-        # Buscar patrón (año). Título
-        match = re.search(r'\((\d{4}[a-z]?)\)\.\s*(.+?)\.(?:\s+[A-Z]|\s+http|$)', ref, re.IGNORECASE)
-        if match:
-            title = match.group(2).strip()
-            # Limpiar posibles URLs y DOIs del título
-            title = re.sub(r'https?://\S+', '', title)
-            title = re.sub(r'doi:\s*\S+', '', title, flags=re.IGNORECASE)
-            return title.strip()
-        
-        # Patrón alternativo: buscar después de año hasta Vol., pp., o revista
-        match = re.search(r'\((\d{4}[a-z]?)\)\.\s*(.+?)(?:\s+Vol\.|\s+pp\.|\s+\d+\(|\.|http)', ref, re.IGNORECASE)
-        if match:
-            title = match.group(2).strip()
-            title = re.sub(r'https?://\S+', '', title)
-            title = re.sub(r'doi:\s*\S+', '', title, flags=re.IGNORECASE)
-            return title.strip()
-    
-    # IEEE: [#] Autor(es), "Título entre comillas," Revista, vol., no., pp., año.
-    elif style == "IEEE":
-        # Buscar texto entre comillas
-        match = re.search(r'"([^"]+)"', ref)
-        if match:
-            return match.group(1).strip()
-        
-        # Si no hay comillas, buscar después de coma y antes de revista/vol
-        match = re.search(r',\s+([^,]+?),\s+(?:vol\.|in\s+)', ref, re.IGNORECASE)
-        if match:
-            return match.group(1).strip()
-    
-    # MLA: Autor(es). "Título." Revista, vol., no., año, pp.
-    elif style == "MLA":
-        # Buscar texto entre comillas
-        match = re.search(r'"([^"]+)"', ref)
-        if match:
-            return match.group(1).strip()
-        
-        # Buscar título en cursiva (después de autores)
-        match = re.search(r'(?:^|\.\s+)([A-Z][^.]+?)\.\s+[A-Z]', ref)
-        if match:
-            return match.group(1).strip()
-    
-    # Chicago: Autor(es). Año. Título. Editorial o Revista.
-    elif style == "Chicago":
-        # Buscar después de año hasta punto
-        match = re.search(r'(\d{4})\.\s*(.+?)\.(?:\s+[A-Z]|$)', ref)
-        if match:
-            title = match.group(2).strip()
-            title = re.sub(r'https?://\S+', '', title)
-            title = re.sub(r'doi:\s*\S+', '', title, flags=re.IGNORECASE)
-            return title.strip()
-    
-    # Vancouver: Autor(es). Título. Revista. Año;vol(no):pp.
-    elif style == "Vancouver":
-        # Buscar título entre primer y segundo punto después de autores
-        parts = ref.split('.')
-        if len(parts) >= 3:
-            # Típicamente: [0]=autores, [1]=título, [2]=revista
-            title = parts[1].strip()
-            if title and not re.match(r'^\d{4}', title):  # No es un año
-                title = re.sub(r'https?://\S+', '', title)
-                title = re.sub(r'doi:\s*\S+', '', title, flags=re.IGNORECASE)
-                return title.strip()
-    
-    # Auto (fallback): intentar detectar automáticamente
-    else:
-        # Intentar cada método en orden de probabilidad
-        for style_attempt in ["APA 7", "IEEE", "MLA", "Vancouver", "Chicago"]:
-            title = extract_title_by_style(reference, style_attempt)
-            if title and len(title) > 10:  # Título razonable encontrado
-                return title
-    
-    return ""
+    return _extract_title_cached(ref, style)
 
 
 def _categorize_doi(category: str, http_status: Any) -> str:
@@ -308,10 +368,21 @@ with tabs_in[2]:
 # =========================
 # Cache
 # =========================
-if "doi_cache" not in st.session_state:
-    st.session_state["doi_cache"] = {}
+if not isinstance(st.session_state.get("doi_cache"), LRUCache):
+    st.session_state["doi_cache"] = LRUCache(DOI_CACHE_SIZE)
 if "crossref_cache" not in st.session_state:
     st.session_state["crossref_cache"] = {}
+# Figshare: detalle por id y DOIs extraídos por PDF (LRU acotado para no crecer sin límite)
+if not isinstance(st.session_state.get("figshare_detail_cache"), LRUCache):
+    st.session_state["figshare_detail_cache"] = LRUCache(FIGSHARE_DETAIL_CACHE_SIZE)
+if not isinstance(st.session_state.get("figshare_pdf_cache"), LRUCache):
+    st.session_state["figshare_pdf_cache"] = LRUCache(FIGSHARE_PDF_CACHE_SIZE)
+fig_detail_cache = st.session_state["figshare_detail_cache"]
+fig_pdf_cache = st.session_state["figshare_pdf_cache"]
+# Sesión HTTP compartida para doi.org (se recrea si cambia el número de workers)
+if st.session_state.get("doi_session_pool") != int(workers):
+    st.session_state["doi_session"] = make_doi_session(int(workers))
+    st.session_state["doi_session_pool"] = int(workers)
 
 # =========================
 # Ejecutar extracción + validación
@@ -323,22 +394,39 @@ if st.button("🚀 Extraer y Validar", type="primary"):
         docs_procesados += len(uploaded_files)
         pdf_progress = st.progress(0)
         pdf_status = st.empty()
-        for idx, uploaded_file in enumerate(uploaded_files, 1):
-            pdf_status.text(f"Extrayendo DOIs de {uploaded_file.name} ({idx}/{len(uploaded_files)})...")
-            pdf_bytes = uploaded_file.read()
-            dois_info, ref_lines = process_pdf_bytes_to_doi_rows(
-                pdf_bytes,
-                file_name=uploaded_file.name,
-                mode=pdf_mode,
-                max_pages_from_end=int(max_pages_from_end),
-                prefer_refs_section=bool(prefer_refs_section),
-            )
-            # enriquecer con bib title
+        n_files = len(uploaded_files)
+        pdf_kwargs = dict(
+            mode=pdf_mode,
+            max_pages_from_end=int(max_pages_from_end),
+            prefer_refs_section=bool(prefer_refs_section),
+        )
+        results: List[Optional[Tuple[List[Dict[str, Any]], List[str]]]] = [None] * n_files
+        if n_files == 1:
+            pdf_status.text(f"Extrayendo DOIs de {uploaded_files[0].name} (1/1)...")
+            # UploadedFile es un stream binario: se pasa directo, sin copiar sus bytes
+            results[0] = process_pdf_bytes_to_doi_rows(uploaded_files[0], file_name=uploaded_files[0].name, **pdf_kwargs)
+        else:
+            # Varios PDFs en hilos: PyMuPDF hace rápida la extracción y cada UploadedFile es su
+            # propio stream. No se usan procesos: con "spawn" cada hijo re-ejecutaría app.py
+            # (Streamlit reemplaza __main__) y con "fork" se clona el servidor multi-hilo.
+            pdf_status.text(f"Extrayendo DOIs de {n_files} archivos...")
+            with ThreadPoolExecutor(max_workers=min(n_files, os.cpu_count() or 1)) as ex:
+                futs = {
+                    ex.submit(process_pdf_bytes_to_doi_rows, f, file_name=f.name, **pdf_kwargs): i
+                    for i, f in enumerate(uploaded_files)
+                }
+                for done, fut in enumerate(as_completed(futs), 1):
+                    i = futs[fut]
+                    results[i] = fut.result()
+                    pdf_status.text(f"Extraído {uploaded_files[i].name} ({done}/{n_files})")
+                    pdf_progress.progress(done / n_files)
+
+        # enriquecer con bib title (en el orden de carga)
+        for dois_info, ref_lines in results:
             for d in dois_info:
                 ref = d.get("reference_line") or ""
-                d["bib_title"] = extract_title_by_style(ref, citation_style) or ""
+                d["bib_title"] = extract_title_by_style(ref, citation_style) if ref else ""
             all_dois_info.extend(dois_info)
-            pdf_progress.progress(idx / len(uploaded_files))
         pdf_progress.empty()
         pdf_status.empty()
 
@@ -348,7 +436,7 @@ if st.button("🚀 Extraer y Validar", type="primary"):
         # Agregar títulos según estilo seleccionado
         for d in pasted_rows:
             ref = d.get("reference_line") or ""
-            d["bib_title"] = extract_title_by_style(ref, citation_style) or ""
+            d["bib_title"] = extract_title_by_style(ref, citation_style) if ref else ""
         all_dois_info.extend(pasted_rows)
 
     # --- C) extraer de Figshare ---
@@ -357,7 +445,11 @@ if st.button("🚀 Extraer y Validar", type="primary"):
         fig_status = st.empty()
         for i, aid in enumerate(fig_ids, 1):
             fig_status.text(f"Figshare {i}/{len(fig_ids)}: id {aid}")
-            detail = figshare_article_detail(aid, timeout_sec=float(timeout))
+            detail = fig_detail_cache.get(aid)
+            if detail is None:
+                detail = figshare_article_detail(aid, timeout_sec=float(timeout))
+                if detail:
+                    fig_detail_cache[aid] = detail
             if not detail:
                 fig_prog.progress(i / len(fig_ids))
                 continue
@@ -367,21 +459,27 @@ if st.button("🚀 Extraer y Validar", type="primary"):
                 continue
             # toma el primer PDF
             pdf_url = pdf_urls[0]
+            pdf_key = (pdf_url, pdf_mode, int(max_pages_from_end), bool(prefer_refs_section))
             try:
-                pdf_bytes = figshare_download_pdf_bytes(pdf_url, timeout_sec=float(timeout))
-                dois_info, ref_lines = process_pdf_bytes_to_doi_rows(
-                    pdf_bytes,
-                    file_name=(detail.get("title") or f"Figshare id:{aid}"),
-                    mode=pdf_mode,
-                    max_pages_from_end=int(max_pages_from_end),
-                    prefer_refs_section=bool(prefer_refs_section),
-                )
+                cached = fig_pdf_cache.get(pdf_key)
+                if cached is None:
+                    with figshare_download_pdf_file(pdf_url, timeout_sec=float(timeout)) as pdf_file:
+                        cached = process_pdf_bytes_to_doi_rows(
+                            pdf_file,
+                            file_name=(detail.get("title") or f"Figshare id:{aid}"),
+                            mode=pdf_mode,
+                            max_pages_from_end=int(max_pages_from_end),
+                            prefer_refs_section=bool(prefer_refs_section),
+                        )
+                    fig_pdf_cache[pdf_key] = cached
+                # copias: las filas se enriquecen abajo y no deben modificar la cache
+                dois_info = [dict(d) for d in cached[0]]
                 for d in dois_info:
                     d["figshare_id"] = aid
                     d["figshare_url"] = detail.get("figshare_url") or ""
                     d["pdf_url"] = pdf_url
                     ref = d.get("reference_line") or ""
-                    d["bib_title"] = extract_title_by_style(ref, citation_style) or ""
+                    d["bib_title"] = extract_title_by_style(ref, citation_style) if ref else ""
                 all_dois_info.extend(dois_info)
             except Exception:
                 pass
@@ -402,18 +500,24 @@ if st.button("🚀 Extraer y Validar", type="primary"):
 
     rows = []
     cache = st.session_state["doi_cache"]
+    sess = st.session_state["doi_session"]
 
     with ThreadPoolExecutor(max_workers=int(workers)) as ex:
         futs = []
         for d in unique_dois:
-            futs.append(ex.submit(validate_doi_http, d["doi"], float(timeout), int(max_retries), cache))
+            futs.append(ex.submit(validate_doi_http, d["doi"], float(timeout), int(max_retries), cache, session=sess))
 
         done = 0
+        last_update = 0.0
         for fut in as_completed(futs):
             doi, ok, category, http_status, message, rt = fut.result()
             done += 1
-            progress.progress(done / max(1, len(unique_dois)))
-            status.text(f"Validando {done}/{len(unique_dois)} ...")
+            # Refrescar widgets como máximo cada PROGRESS_INTERVAL (cada update es un round-trip)
+            now = time.monotonic()
+            if now - last_update > PROGRESS_INTERVAL or done == len(unique_dois):
+                progress.progress(done / max(1, len(unique_dois)))
+                status.text(f"Validando {done}/{len(unique_dois)} ...")
+                last_update = now
 
             # Categorización refinada
             refined_category = _categorize_doi(category, http_status)
@@ -438,50 +542,62 @@ if st.button("🚀 Extraer y Validar", type="primary"):
                 }
             )
 
-    # reconectar info auxiliar
-    by_doi = {d["doi"].lower(): d for d in unique_dois}
-    for r in rows:
-        d = by_doi.get(r["DOI"].lower(), {})
-        r["Archivo"] = d.get("file_name", "N/A")
-        r["Página"] = d.get("page", "N/A")
-        r["Patrón"] = d.get("pattern", "")
-        r["Contexto"] = d.get("context", "")
-        r["Referencia (línea)"] = d.get("reference_line", "")
-        r["Título (Bibliografía)"] = d.get("bib_title", "")
-        r["Figshare ID"] = d.get("figshare_id", "")
-        r["Figshare URL"] = d.get("figshare_url", "")
-        r["PDF URL"] = d.get("pdf_url", "")
+    # reconectar info auxiliar (map por DOI en minúsculas, columna a columna)
+    df = pd.DataFrame(rows)
+    doi_keys = df["DOI"].str.lower()
+    aux = pd.DataFrame(unique_dois, dtype=object)
+    aux.index = aux["doi"].str.lower()
+    for col, src, default in _AUX_COLUMNS:
+        df[col] = doi_keys.map(aux[src]).fillna(default) if src in aux.columns else default
 
     # --- Crossref + match ---
     if include_crossref:
         status.text("Consultando títulos por DOI (Crossref)...")
         cr_cache = st.session_state["crossref_cache"]
-        for i, r in enumerate(rows, start=1):
-            doi = r["DOI"]
-            key = doi.lower()
-            if key in cr_cache:
-                cr_title, cr_src = cr_cache[key]
-            else:
-                cr_title, cr_src = crossref_title_by_doi(doi, timeout=float(timeout))
-                cr_cache[key] = (cr_title, cr_src)
-
-            r["Título (Crossref)"] = cr_title or ""
-            r["Fuente (Crossref)"] = cr_src or ""
-
-            if validate_title_match:
-                score = title_match_score(r.get("Título (Bibliografía)"), r.get("Título (Crossref)"))
-                r["Score título"] = "" if score is None else score
-                label = title_match_label(score, float(title_threshold))
-                # Traducir etiquetas de match
-                label_traduccion = {"match": "coincide", "mismatch": "no_coincide", "unknown": "desconocido"}
-                r["Título match"] = label_traduccion.get(label, "desconocido")
-            else:
-                r["Score título"] = ""
-                r["Título match"] = "desconocido"
-
-            status.text(f"Crossref {i}/{len(rows)}")
-
-    df = to_dataframe(rows)
+        # Consultar en paralelo solo los DOIs que no están en cache
+        misses = {}
+        for key, doi in zip(doi_keys, df["DOI"]):
+            if key not in cr_cache and key not in misses:
+                misses[key] = doi
+        # 1) Lote (/works?filter=doi:...): una petición cada 50 DOIs
+        if misses:
+            found = crossref_titles_for_dois(misses.values(), timeout=float(timeout))
+            for key in list(misses):
+                if key in found:
+                    cr_cache[key] = found[key]
+                    del misses[key]
+        # 2) Lo que el lote no devolvió: consulta individual en paralelo
+        with ThreadPoolExecutor(max_workers=int(workers)) as ex:
+            futs = {ex.submit(crossref_title_by_doi, doi, float(timeout)): key for key, doi in misses.items()}
+            last_update = 0.0
+            for i, fut in enumerate(as_completed(futs), start=1):
+                cr_cache[futs[fut]] = fut.result()
+                now = time.monotonic()
+                if now - last_update > PROGRESS_INTERVAL or i == len(futs):
+                    status.text(f"Crossref {i}/{len(futs)}")
+                    last_update = now
+
+        cr_hits = {k: cr_cache[k] for k in set(doi_keys)}
+        df["Título (Crossref)"] = doi_keys.map({k: v[0] for k, v in cr_hits.items()}).fillna("")
+        df["Fuente (Crossref)"] = doi_keys.map({k: v[1] for k, v in cr_hits.items()}).fillna("")
+
+        if validate_title_match:
+            scores = pd.Series(
+                [title_match_score(b, c) for b, c in zip(df["Título (Bibliografía)"], df["Título (Crossref)"])],
+                index=df.index,
+                dtype="float64",
+            )
+            missing = scores.isna()
+            df["Score título"] = scores.astype(object).where(~missing, "")
+            # Mismas reglas que title_match_label, ya traducidas: None -> desconocido, >= umbral -> coincide
+            df["Título match"] = np.where(
+                missing, "desconocido", np.where(scores >= float(title_threshold), "coincide", "no_coincide")
+            )
+        else:
+            df["Score título"] = ""
+            df["Título match"] = "desconocido"
+
+    df = to_dataframe(df)
     st.session_state["df"] = df
     st.session_state["docs_procesados"] = docs_procesados
 
@@ -500,10 +616,12 @@ tabs = st.tabs(["📊 Dashboard", "📋 Resultados", "⬇️ Exportar"])
 
 with tabs[0]:
     total_dois = len(df)
-    valid_count = _safe_int((df["Categoría"] == "válido").sum()) if "Categoría" in df.columns else 0
-    invalid_count = _safe_int((df["Categoría"] == "inválido").sum()) if "Categoría" in df.columns else 0
-    suspicious_count = _safe_int((df["Categoría"] == "sospechoso").sum()) if "Categoría" in df.columns else 0
-    unknown_count = _safe_int((df["Categoría"] == "desconocido").sum()) if "Categoría" in df.columns else 0
+    # Un solo recorrido de la columna para las 4 categorías
+    cat_counts = df["Categoría"].value_counts() if "Categoría" in df.columns else {}
+    valid_count = int(cat_counts.get("válido", 0))
+    invalid_count = int(cat_counts.get("inválido", 0))
+    suspicious_count = int(cat_counts.get("sospechoso", 0))
+    unknown_count = int(cat_counts.get("desconocido", 0))
     pct_valid = round((valid_count / max(1, total_dois)) * 100, 1)
 
     # KPIs con las 4 categorías
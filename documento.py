@@ -1,14 +1,21 @@
 from __future__ import annotations
 
+import os
 import re
+import tempfile
 from io import BytesIO
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple, Union
 
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
-# Optional PDF extractor
+# Optional PDF extractors (PyMuPDF es bastante más rápido; pdfplumber/PyPDF2 quedan de respaldo)
+try:
+    import pymupdf  # type: ignore
+except Exception:  # pragma: no cover
+    pymupdf = None
+
 try:
     import pdfplumber  # type: ignore
 except Exception:  # pragma: no cover
@@ -19,12 +26,25 @@ try:
 except Exception as e:  # pragma: no cover
     PdfReader = None  # type: ignore
 
+# Optional: parser JSON más rápido para respuestas de Figshare (misma API loads que json)
+try:
+    import orjson as _json  # type: ignore
+except Exception:  # pragma: no cover
+    import json as _json  # type: ignore
+
 from src.pdf_extract import normalize_text
 from src.references import slice_references_section, extract_reference_lines
 from src.doi_extract import clean_doi, is_valid_doi_format
 
 FIGSHARE_BASE = "https://api.figshare.com/v2"
 
+# PDF en memoria (bytes) o archivo/stream binario (UploadedFile, archivo temporal, ...)
+PdfSource = Union[bytes, BinaryIO]
+
+# Un stream sin ruta en disco solo se carga entero en memoria (para PyMuPDF) hasta este tamaño;
+# por encima se usa pdfplumber, que lee el stream por partes
+PDF_IN_MEMORY_MAX_BYTES = 16 * 1024 * 1024
+
 
 # =========================================================
 # Requests: sesión con reintentos (robusto)
@@ -70,7 +90,7 @@ def figshare_list_theses(limit: int = 50, timeout_sec: float = 30.0) -> List[Dic
             r = s.get(f"{FIGSHARE_BASE}/articles", params=params, timeout=float(timeout_sec))
             if r.status_code >= 400:
                 break
-            batch = r.json() or []
+            batch = (_json.loads(r.content) if r.content else None) or []
             if not isinstance(batch, list) or not batch:
                 break
             out.extend(batch)
@@ -88,7 +108,7 @@ def figshare_article_detail(article_id: int, timeout_sec: float = 30.0) -> Optio
         r = s.get(f"{FIGSHARE_BASE}/articles/{int(article_id)}", timeout=float(timeout_sec))
         if r.status_code >= 400:
             return None
-        data = r.json()
+        data = _json.loads(r.content) if r.content else None
         return data if isinstance(data, dict) else None
     except Exception:
         return None
@@ -106,34 +126,96 @@ def figshare_extract_pdf_urls(detail: Dict[str, Any]) -> List[str]:
     return pdfs
 
 
-def figshare_download_pdf_bytes(url: str, timeout_sec: float = 60.0) -> bytes:
+def figshare_download_pdf_file(url: str, timeout_sec: float = 60.0) -> BinaryIO:
+    """Descarga el PDF en streaming a un archivo temporal en disco (la memoria no crece con el tamaño del PDF).
+    Al tener ruta, extract_text_from_pdf_bytes lo abre con PyMuPDF por ruta, sin cargarlo entero.
+    Devuelve el archivo posicionado al inicio; el llamador debe cerrarlo (al cerrarlo se borra).
+    """
     s = session_with_retries()
-    r = s.get(url, timeout=float(timeout_sec))
-    r.raise_for_status()
-    return r.content
+    with s.get(url, timeout=float(timeout_sec), stream=True) as r:
+        r.raise_for_status()
+        f = tempfile.NamedTemporaryFile(suffix=".pdf")
+        try:
+            for chunk in r.iter_content(chunk_size=64 * 1024):
+                if chunk:
+                    f.write(chunk)
+        except Exception:
+            f.close()  # descarga cortada: no dejar el temporal abierto
+            raise
+    f.seek(0)
+    return f
 
 
 # =========================================================
 # PDF text extraction
 # =========================================================
-def extract_text_from_pdf_bytes(pdf_bytes: bytes, mode: str = "tail", max_pages_from_end: int = 10) -> str:
+def _as_pdf_stream(pdf_source: PdfSource) -> BinaryIO:
+    if isinstance(pdf_source, (bytes, bytearray)):
+        return BytesIO(pdf_source)
+    pdf_source.seek(0)
+    return pdf_source
+
+
+def _open_with_pymupdf(pdf_source: PdfSource):
+    """Abre el PDF con PyMuPDF sin duplicarlo en memoria; None si habría que cargar un stream grande."""
+    if isinstance(pdf_source, (bytes, bytearray)):
+        return pymupdf.open(stream=pdf_source, filetype="pdf")
+    stream = _as_pdf_stream(pdf_source)
+    if isinstance(stream, BytesIO):  # UploadedFile incluido: ya está en memoria, getvalue no copia
+        return pymupdf.open(stream=stream.getvalue(), filetype="pdf")
+    # Archivo en disco (p. ej. NamedTemporaryFile): PyMuPDF lo abre por ruta, sin cargarlo entero
+    path = getattr(stream, "name", None)
+    if isinstance(path, str) and os.path.isabs(path) and os.path.isfile(path):
+        return pymupdf.open(path, filetype="pdf")
+    size = stream.seek(0, os.SEEK_END)
+    stream.seek(0)
+    if size > PDF_IN_MEMORY_MAX_BYTES:
+        return None
+    return pymupdf.open(stream=stream.read(), filetype="pdf")
+
+
+def extract_text_from_pdf_bytes(pdf_source: PdfSource, mode: str = "tail", max_pages_from_end: int = 10) -> str:
     """Extrae texto del PDF.
+    pdf_source: bytes o archivo binario. PyMuPDF abre los archivos en disco por ruta y solo carga
+    en memoria streams de hasta PDF_IN_MEMORY_MAX_BYTES; pdfplumber/PyPDF2 leen el stream directamente.
     mode: 'tail' (últimas N páginas) o 'full' (todo).
-    Preferencia: pdfplumber si está disponible, si no PyPDF2.
+    Preferencia: PyMuPDF, luego pdfplumber, luego PyPDF2 (según lo que esté instalado).
     """
+    doc = None
+    if pymupdf is not None:
+        try:
+            doc = _open_with_pymupdf(pdf_source)
+        except Exception:
+            doc = None  # PDF que PyMuPDF no abre: probar con los otros extractores
+    if doc is not None:
+        try:
+            with doc:
+                total = doc.page_count
+                start = 0 if mode == "full" else max(0, total - int(max_pages_from_end))
+                parts: List[str] = []
+                for i in range(start, total):
+                    parts.append(normalize_text(doc.load_page(i).get_text("text") or ""))
+                return "\n".join(parts)
+        except Exception:
+            pass  # falla al leer páginas: probar con los otros extractores
+
     if pdfplumber is not None:
-        with pdfplumber.open(BytesIO(pdf_bytes)) as pdf:
+        with pdfplumber.open(_as_pdf_stream(pdf_source)) as pdf:
             pages = pdf.pages
-            chosen = pages if mode == "full" else (pages[-max_pages_from_end:] if len(pages) > max_pages_from_end else pages)
-            parts: List[str] = []
-            for p in chosen:
+            total = len(pages)
+            start = 0 if mode == "full" else max(0, total - int(max_pages_from_end))
+            parts = []
+            # acceso por índice: en modo tail no se toca el contenido de las páginas anteriores
+            for i in range(start, total):
+                p = pages[i]
                 parts.append(normalize_text(p.extract_text() or ""))
+                p.flush_cache()  # libera los objetos de layout de la página ya procesada
             return "\n".join(parts)
 
     if PdfReader is None:
         return ""
 
-    reader = PdfReader(BytesIO(pdf_bytes))
+    reader = PdfReader(_as_pdf_stream(pdf_source))
     total = len(reader.pages)
     start = 0 if mode == "full" else max(0, total - int(max_pages_from_end))
     parts = []
@@ -150,63 +232,78 @@ def extract_text_from_pdf_bytes(pdf_bytes: bytes, mode: str = "tail", max_pages_
 # =========================================================
 _DOI_REGEX_ROBUST = re.compile(r"(10\.\d{4,9}(?:\.\d+)*\s*/\s*[-._;()/:A-Z0-9]+)", flags=re.IGNORECASE)
 _TRAILING_PUNCT = ".,;:)]}>\"'"
+_HYPHEN_BREAK_RE = re.compile(r"(\w)-\s*\n\s*(\w)")
+_LINE_BREAK_RE = re.compile(r"(\S)\s*\n\s*(\S)")
+_SLASH_WS_RE = re.compile(r"\s*/\s*")
+_WS_RE = re.compile(r"\s+")
 
 def _normalize_for_doi_harvest(t: str) -> str:
     if not t:
         return ""
     t = t.replace("\u00ad", "")  # soft hyphen
-    t = re.sub(r"(\w)-\s*\n\s*(\w)", r"\1\2", t)  # une cortes con guion
-    t = re.sub(r"(\S)\s*\n\s*(\S)", r"\1 \2", t)  # une saltos de línea
-    t = re.sub(r"\s*/\s*", "/", t)  # normaliza slash
+    # Cada pasada solo corre si puede tener efecto (el orden importa: no se fusionan)
+    if "\n" in t:
+        if "-" in t:
+            t = _HYPHEN_BREAK_RE.sub(r"\1\2", t)  # une cortes con guion
+        t = _LINE_BREAK_RE.sub(r"\1 \2", t)  # une saltos de línea
+    if "/" in t:
+        t = _SLASH_WS_RE.sub("/", t)  # normaliza slash
     return t
 
 def extract_dois_robust(text: str, max_context: int = 60) -> List[Dict[str, Any]]:
     t = _normalize_for_doi_harvest(normalize_text(text or ""))
     out: List[Dict[str, Any]] = []
+    if "10." not in t:
+        return out  # todo DOI empieza con "10."; str.find es mucho más barato que el regex
+    # finditer entrega en orden de posición: el dedup se hace en el mismo recorrido
+    seen = set()
     for m in _DOI_REGEX_ROBUST.finditer(t):
         raw = (m.group(1) or "").strip().rstrip(_TRAILING_PUNCT)
         doi = clean_doi(raw).rstrip(_TRAILING_PUNCT)
         if not doi or not is_valid_doi_format(doi):
             continue
+        k = doi.lower()
+        if k in seen:
+            continue
+        seen.add(k)
+        # El contexto solo se arma para los DOIs que sobreviven al dedup
         start = max(0, m.start() - max_context)
         end = min(len(t), m.end() + max_context)
         ctx = t[start:end].replace("\n", " ").strip()
         out.append({"doi": doi, "raw": raw, "pattern": "Robusto", "position": m.start(), "context": ctx})
-
-    out.sort(key=lambda x: x["position"])
-    seen = set()
-    uniq: List[Dict[str, Any]] = []
-    for d in out:
-        k = d["doi"].lower()
-        if k in seen:
-            continue
-        uniq.append(d)
-        seen.add(k)
-    return uniq
+    return out
 
 
 # =========================================================
 # Helpers para referencias
 # =========================================================
-def find_reference_line_for_doi(doi: str, reference_lines: List[str]) -> Optional[str]:
-    doi_norm = re.sub(r"\s+", "", (doi or "").lower())
+def _precompute_reference_lines(reference_lines: List[str]) -> List[Tuple[str, str]]:
+    """(línea compacta en minúsculas, línea original): se calcula una vez por PDF, no por DOI."""
+    return [(_WS_RE.sub("", (ln or "").lower()), ln) for ln in reference_lines or []]
+
+
+def _find_reference_line_prepared(doi: str, prepared: List[Tuple[str, str]]) -> Optional[str]:
+    doi_norm = _WS_RE.sub("", (doi or "").lower())
     if not doi_norm:
         return None
-    for ln in reference_lines or []:
-        ln_norm = re.sub(r"\s+", "", (ln or "").lower())
+    for ln_norm, ln in prepared:
         if doi_norm in ln_norm:
             return ln
     return None
 
 
+def find_reference_line_for_doi(doi: str, reference_lines: List[str]) -> Optional[str]:
+    return _find_reference_line_prepared(doi, _precompute_reference_lines(reference_lines))
+
+
 def process_pdf_bytes_to_doi_rows(
-    pdf_bytes: bytes,
+    pdf_source: PdfSource,
     file_name: str,
     mode: str = "tail",
     max_pages_from_end: int = 10,
     prefer_refs_section: bool = True,
 ) -> Tuple[List[Dict[str, Any]], List[str]]:
-    base_text = extract_text_from_pdf_bytes(pdf_bytes, mode=mode, max_pages_from_end=max_pages_from_end)
+    base_text = extract_text_from_pdf_bytes(pdf_source, mode=mode, max_pages_from_end=max_pages_from_end)
     base_text = normalize_text(base_text or "")
 
     if prefer_refs_section:
@@ -217,10 +314,11 @@ def process_pdf_bytes_to_doi_rows(
 
     dois_info = extract_dois_robust(text_for_dois)
     reference_lines = extract_reference_lines(text_for_dois)
+    prepared = _precompute_reference_lines(reference_lines)
 
     for d in dois_info:
         d["file_name"] = file_name
         d["page"] = "N/A"
-        d["reference_line"] = find_reference_line_for_doi(d["doi"], reference_lines) or ""
+        d["reference_line"] = _find_reference_line_prepared(d["doi"], prepared) or ""
 
     return dois_info, reference_lines
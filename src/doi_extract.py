@@ -1,16 +1,54 @@
 import re
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Sequence, Tuple
 
+from .metadata import title_match_scores
 from .pdf_extract import normalize_text
 
 DOI_PATTERNS = [
-    r"doi:\s*(10\.\d{4,9}(?:\.\d+)*\/(?:(?![\"&\'<>])\S)+)",
-    r"https?://(?:dx\.)?doi\.org/(10\.\d{4,9}(?:\.\d+)*\/(?:(?![\"&\'<>])\S)+)",
-    r"(?:^|[\s\(\[{,;:])(10\.\d{4,9}(?:\.\d+)*\/(?:(?![\"&\'<>])\S)+)",
-    r"[\[\(\{](10\.\d{4,9}(?:\.\d+)*\/(?:(?![\"&\'<>])\S)+)[\]\)\}]",
-    r"(?:DOI|doi|Doi)[\s:]+(10\.\d{4,9}(?:\.\d+)*\/(?:(?![\"&\'<>])\S)+)",
+    r"doi:\s*(10\.\d{4,9}(?:\.\d+)*\/[^\s\"&\'<>]+)",
+    r"https?://(?:dx\.)?doi\.org/(10\.\d{4,9}(?:\.\d+)*\/[^\s\"&\'<>]+)",
+    r"(?:^|[\s\(\[{,;:])(10\.\d{4,9}(?:\.\d+)*\/[^\s\"&\'<>]+)",
+    r"[\[\(\{](10\.\d{4,9}(?:\.\d+)*\/[^\s\"&\'<>]+)[\]\)\}]",
+    r"(?:DOI|doi|Doi)[\s:]+(10\.\d{4,9}(?:\.\d+)*\/[^\s\"&\'<>]+)",
 ]
 
+# Los 5 patrones comparten el mismo núcleo: se escanea UNA vez con el núcleo y el patrón
+# se clasifica mirando el texto inmediatamente anterior al match.
+# El sufijo es una clase negada ([^\s"&'<>]+, equivalente a (?:(?!["&'<>])\S)+): sin lookahead
+# por carácter el motor avanza en lineal, y el patrón también es válido para RE2.
+_DOI_CORE = r"10\.\d{4,9}(?:\.\d+)*\/[^\s\"&\'<>]+"
+_DOI_UNIFIED = re.compile(_DOI_CORE, re.IGNORECASE)
+_PRE_WINDOW = 24
+_RE_PRE_URL = re.compile(r"https?://(?:dx\.)?doi\.org/$", re.IGNORECASE)  # Patrón 2
+_RE_PRE_LABEL = re.compile(r"doi([\s:]+)$", re.IGNORECASE)  # Patrón 1 (doi:) / Patrón 5 (DOI )
+_PRE_OPEN = "([{"  # Patrón 4
+_PRE_SEP = "([{,;:"  # Patrón 3 (además de espacios / inicio de texto)
+
+# Regex precompilados (se usan por cada DOI / línea / página)
+_RE_HYPHEN_BREAK = re.compile(r"-\s*\n\s*")
+_RE_SLASH_AFTER_NL = re.compile(r"/\s*\n\s*")
+_RE_SLASH_BEFORE_NL = re.compile(r"\s*\n\s*/")
+_RE_WS = re.compile(r"\s+")
+_RE_DOI_VALID_FMT = re.compile(r"^10\.\d{4,9}(?:\.\d+)*\/.+$")
+_INVALID_DOI_CHARS = frozenset('<>"{}|\\^` ')
+# Entidades HTML: primero las que se eliminan, luego las que se decodifican (una pasada cada una);
+# "&amp;lt;" / "&amp;gt;" (doble codificación) dan "<" / ">"
+_RE_HTML_DROP = re.compile(r"&(?:quot|#34|nbsp);")
+_HTML_ENTITIES = {"&amp;lt;": "<", "&amp;gt;": ">", "&amp;": "&", "&lt;": "<", "&gt;": ">"}
+_RE_HTML_ENTITY = re.compile("|".join(map(re.escape, _HTML_ENTITIES)))
+_RE_TRAIL_PUNCT = re.compile(r"[.,;:)\]}\'\"]+$")
+_RE_DOTS = re.compile(r"\.{2,}$")
+_RE_PAGE_WORDS = re.compile(r"\bpp\b|\bvol\b|\bno\b|\bissue\b|\bpages?\b")
+_RE_YEAR_ONLY = re.compile(r"(19|20)\d{2}([,;]\s*)?(pp\.?)?")
+_RE_URL = re.compile(r"https?://\S+", re.IGNORECASE)
+_RE_DOI_PREFIXED = re.compile(r"\bdoi:\s*\S+", re.IGNORECASE)
+_RE_DOI_BARE = re.compile(r"\b10\.\d{4,9}(?:\.\d+)*\/\S+", re.IGNORECASE)
+_RE_ND = re.compile(r"\(\s*n\.d\.\s*\)", re.IGNORECASE)
+_RE_YEAR_PAREN = re.compile(r"\(\s*((?:19|20)\d{2}[a-z]?|n\.d\.)\s*\)\s*", re.IGNORECASE)
+_RE_LEADING_PUNCT = re.compile(r"^[\.\:\;\-–—\s]+")
+_RE_RETRIEVED = re.compile(r"\bRetrieved\s+from\b", re.IGNORECASE)
+_RE_QUOTED = re.compile(r"[\"“”](.+?)[\"“”]")
+
 
 # =========================================================
 # Normalización extra para DOIs "rotos" por PDF
@@ -35,11 +73,11 @@ def normalize_text_for_doi_extraction(text: str) -> str:
     # 1) Unir palabras/DOIs partidos por guion de final de línea (hyphenation)
     # SOLO si el guion está justo antes de un salto (o espacios + salto).
     # Ej: "9928-\n254" o "9928- \n 254" => "9928254"
-    t = re.sub(r"-\s*\n\s*", "", t)
+    t = _RE_HYPHEN_BREAK.sub("", t)
 
     # 2) Unir cortes alrededor de "/" (muy común en DOIs)
-    t = re.sub(r"/\s*\n\s*", "/", t)      # después de /
-    t = re.sub(r"\s*\n\s*/", "/", t)      # antes de /
+    t = _RE_SLASH_AFTER_NL.sub("/", t)      # después de /
+    t = _RE_SLASH_BEFORE_NL.sub("/", t)     # antes de /
 
     return t
 
@@ -53,37 +91,49 @@ def clean_doi(doi: str) -> str:
     Nota: La "reparación" de guiones por salto de línea se hace ANTES (en normalize_text_for_doi_extraction).
     """
     doi = normalize_text(doi)
-    doi = re.sub(r"\s+", "", doi)
-    doi = (
-        doi.replace("&quot;", "")
-        .replace("&#34;", "")
-        .replace("&nbsp;", "")
-        .replace("&amp;", "&")
-        .replace("&lt;", "<")
-        .replace("&gt;", ">")
-    )
-    doi = re.sub(r"[.,;:)\]}\'\"]+$", "", doi)
-    doi = re.sub(r"\.{2,}$", "", doi)
+    doi = _RE_WS.sub("", doi)
+    if "&" in doi:
+        doi = _RE_HTML_DROP.sub("", doi)
+        doi = _RE_HTML_ENTITY.sub(lambda m: _HTML_ENTITIES[m.group(0)], doi)
+    doi = _RE_TRAIL_PUNCT.sub("", doi)
+    doi = _RE_DOTS.sub("", doi)
     return doi.strip()
 
 
 def is_valid_doi_format(doi: str) -> bool:
-    if not re.match(r"^10\.\d{4,9}(?:\.\d+)*\/.+$", doi):
+    # Descarte barato antes del regex (la mayoría de candidatos inválidos falla aquí)
+    if not doi.startswith("10.") or "/" not in doi:
         return False
-    parts = doi.split("/", 1)
-    if len(parts) < 2:
+    if not _RE_DOI_VALID_FMT.match(doi):
         return False
-    suffix = parts[1].strip()
+    suffix = doi.split("/", 1)[1].strip()
     if len(suffix) < 2:
         return False
-    invalid_chars = ["<", ">", '"', "{", "}", "|", "\\", "^", "`", " "]
-    return not any(c in doi for c in invalid_chars)
+    return _INVALID_DOI_CHARS.isdisjoint(doi)
+
+
+def _classify_doi_prefix(pre: str) -> Optional[str]:
+    """Devuelve el patrón de DOI_PATTERNS que corresponde al texto previo, o None si ninguno aplica."""
+    if _RE_PRE_URL.search(pre):
+        return "Patrón 2"
+    m = _RE_PRE_LABEL.search(pre)
+    if m:
+        return "Patrón 1" if m.group(1).startswith(":") else "Patrón 5"
+    if not pre:
+        return "Patrón 3"
+    last = pre[-1]
+    if last in _PRE_OPEN:
+        return "Patrón 4"
+    if last.isspace() or last in _PRE_SEP:
+        return "Patrón 3"
+    return None
 
 
 def extract_dois_from_text(text: str, max_context: int = 60) -> List[Dict]:
     """
-    Extracts DOIs from text using multiple patterns.
+    Extracts DOIs from text using multiple patterns (a single scan over the text).
     Returns list of dicts with: doi, raw, pattern, position, context
+    One entry per DOI (case-insensitive), in order of first appearance.
 
     FIX: Antes de normalize_text(), repara artefactos de PDFs que "rompen" DOIs.
     """
@@ -94,23 +144,27 @@ def extract_dois_from_text(text: str, max_context: int = 60) -> List[Dict]:
     t = normalize_text(repaired)
 
     out: List[Dict] = []
+    seen = set()
 
-    for idx, pat in enumerate(DOI_PATTERNS, start=1):
-        for m in re.finditer(pat, t, flags=re.IGNORECASE):
-            raw = m.group(1)
-            doi = clean_doi(raw)
-            if not doi or not is_valid_doi_format(doi):
-                continue
+    for m in _DOI_UNIFIED.finditer(t):
+        pattern = _classify_doi_prefix(t[max(0, m.start() - _PRE_WINDOW):m.start()])
+        if pattern is None:
+            continue
+        raw = m.group(0)
+        doi = clean_doi(raw)
+        if not doi or not is_valid_doi_format(doi):
+            continue
+        key = doi.lower()
+        if key in seen:
+            continue
+        seen.add(key)
 
-            start = max(0, m.start() - max_context)
-            end = min(len(t), m.end() + max_context)
-            context = t[start:end].replace("\n", " ").strip()
+        start = max(0, m.start() - max_context)
+        end = min(len(t), m.end() + max_context)
+        context = t[start:end].replace("\n", " ").strip()
 
-            out.append(
-                {"doi": doi, "raw": raw, "pattern": f"Patrón {idx}", "position": m.start(), "context": context}
-            )
+        out.append({"doi": doi, "raw": raw, "pattern": pattern, "position": m.start(), "context": context})
 
-    out.sort(key=lambda x: x["position"])
     return out
 
 
@@ -120,24 +174,48 @@ def assign_page(dois_info: List[Dict], pages_text: List[str]) -> None:
     se aplica la misma reparación (normalize_text_for_doi_extraction) por página
     y se compara en versión "compacta" (sin espacios).
     """
+    # Cada página se repara/normaliza una sola vez (no una vez por DOI)
+    compacted = [
+        _RE_WS.sub("", normalize_text(normalize_text_for_doi_extraction(p or "")).lower()) for p in pages_text
+    ]
+
     for d in dois_info:
         d["page"] = "N/A"
         target = (d.get("doi") or "").lower()
         if not target:
             continue
 
-        target_compact = re.sub(r"\s+", "", target)
-
-        for pi, ptxt in enumerate(pages_text, 1):
-            page_repaired = normalize_text_for_doi_extraction(ptxt or "")
-            page_norm = normalize_text(page_repaired).lower()
-            page_compact = re.sub(r"\s+", "", page_norm)
+        target_compact = _RE_WS.sub("", target)
 
+        for pi, page_compact in enumerate(compacted, 1):
             if target_compact in page_compact:
                 d["page"] = pi
                 break
 
 
+# (línea compacta en minúsculas, línea normalizada) por cada línea de referencia
+PreparedRefs = List[Tuple[str, str]]
+
+
+def precompute_reference_lines(reference_lines: Optional[Sequence[str]]) -> PreparedRefs:
+    """
+    Repara y normaliza cada línea UNA vez, para reutilizarla en la búsqueda de todos los DOIs.
+    El resultado se puede pasar a pick_best_reference_block_for_doi(prepared=...).
+    """
+    out: PreparedRefs = []
+    for ln in reference_lines or []:
+        norm = normalize_text(normalize_text_for_doi_extraction(ln or ""))
+        out.append((_RE_WS.sub("", norm.lower()), norm))
+    return out
+
+
+def _find_reference_candidates_prepared(doi: str, prepared: PreparedRefs) -> List[tuple[int, str]]:
+    doi_norm = _RE_WS.sub("", (doi or "").lower())
+    if not doi_norm:
+        return []
+    return [(i, ln_norm) for i, (ln_compact, ln_norm) in enumerate(prepared) if doi_norm in ln_compact]
+
+
 def find_reference_line_for_doi(doi: str, reference_lines: List[str]) -> Optional[str]:
     """
     Intenta ubicar la línea de referencia que contiene el DOI.
@@ -145,29 +223,12 @@ def find_reference_line_for_doi(doi: str, reference_lines: List[str]) -> Optiona
     FIX: además de compactar espacios, repara posibles artefactos de partición
     dentro de cada línea (por si extract_reference_lines devuelve fragmentos con \n).
     """
-    doi_norm = re.sub(r"\s+", "", (doi or "").lower())
-    if not doi_norm:
-        return None
-
-    for ln in reference_lines or []:
-        ln_rep = normalize_text_for_doi_extraction(ln or "")
-        ln_norm = re.sub(r"\s+", "", normalize_text(ln_rep).lower())
-        if doi_norm in ln_norm:
-            return normalize_text(ln_rep)
-    return None
+    cands = _find_reference_candidates_prepared(doi, precompute_reference_lines(reference_lines))
+    return cands[0][1] if cands else None
 
 def find_reference_candidates_for_doi(doi: str, reference_lines: List[str]) -> List[tuple[int, str]]:
     """Devuelve TODOS los índices/líneas donde aparece el DOI (no solo la primera)."""
-    doi_norm = re.sub(r"\s+", "", (doi or "").lower())
-    if not doi_norm:
-        return []
-    out = []
-    for i, ln in enumerate(reference_lines or []):
-        ln_rep = normalize_text_for_doi_extraction(ln or "")
-        ln_norm = re.sub(r"\s+", "", normalize_text(ln_rep).lower())
-        if doi_norm in ln_norm:
-            out.append((i, normalize_text(ln_rep)))
-    return out
+    return _find_reference_candidates_prepared(doi, precompute_reference_lines(reference_lines))
 
 
 def build_reference_block_around_index(reference_lines: List[str], idx: int, before: int = 5, after: int = 1) -> str:
@@ -180,7 +241,7 @@ def build_reference_block_around_index(reference_lines: List[str], idx: int, bef
     block = " ".join(reference_lines[start:end])
     block = normalize_text_for_doi_extraction(block)
     block = normalize_text(block)
-    block = re.sub(r"\s+", " ", block).strip()
+    block = _RE_WS.sub(" ", block).strip()
     return block
 
 
@@ -188,13 +249,13 @@ def _is_plausible_title_for_selection(t: Optional[str]) -> bool:
     """Filtro ligero para evitar 'pp', 'vol', años, etc."""
     if not t:
         return False
-    s = re.sub(r"\s+", " ", t).strip()
+    s = _RE_WS.sub(" ", t).strip()
     low = s.lower()
     if len(s.split()) < 5:
         return False
-    if re.search(r"\bpp\b|\bvol\b|\bno\b|\bissue\b|\bpages?\b", low) and len(s.split()) < 8:
+    if _RE_PAGE_WORDS.search(low) and len(s.split()) < 8:
         return False
-    if re.fullmatch(r"(19|20)\d{2}([,;]\s*)?(pp\.?)?", low):
+    if _RE_YEAR_ONLY.fullmatch(low):
         return False
     return True
 
@@ -205,14 +266,18 @@ def pick_best_reference_block_for_doi(
     crossref_title: str = "",
     before: int = 5,
     after: int = 1,
+    prepared: Optional[PreparedRefs] = None,
 ) -> tuple[str, Optional[str], float]:
     """
     Selecciona el mejor bloque de referencia para el DOI.
     Si hay título Crossref, usa ese título como ancla para escoger el bloque correcto.
+    prepared: precompute_reference_lines(reference_lines), para no renormalizar por cada DOI.
 
     Returns: (best_block, best_bib_title, selection_score)
     """
-    cands = find_reference_candidates_for_doi(doi, reference_lines)
+    if prepared is None:
+        prepared = precompute_reference_lines(reference_lines)
+    cands = _find_reference_candidates_prepared(doi, prepared)
     if not cands:
         return "", None, 0.0
 
@@ -220,20 +285,24 @@ def pick_best_reference_block_for_doi(
     best_title = None
     best_score = 0.0
 
-    cr = normalize_text(crossref_title or "")
+    blocks: List[str] = []
+    bib_titles: List[str] = []
     for idx, _ln in cands:
         block = build_reference_block_around_index(reference_lines, idx, before=before, after=after)
         bib_title = extract_bibliographic_title(block)
+        if _is_plausible_title_for_selection(bib_title):
+            blocks.append(block)
+            bib_titles.append(bib_title)
 
-        if not _is_plausible_title_for_selection(bib_title):
-            continue
-
-        if cr:
-            s = title_match_score(bib_title, cr) or 0.0
-        else:
-            # Sin Crossref: escoger el más “largo/estable” como heurística mínima
-            s = min(1.0, len(bib_title) / 200.0)
-
+    cr = normalize_text(crossref_title or "")
+    if cr:
+        # Todos los candidatos contra el título Crossref en un solo lote
+        scores = [s or 0.0 for s in title_match_scores(bib_titles, cr)]
+    else:
+        # Sin Crossref: escoger el más “largo/estable” como heurística mínima
+        scores = [min(1.0, len(t) / 200.0) for t in bib_titles]
+
+    for block, bib_title, s in zip(blocks, bib_titles, scores):
         if s > best_score:
             best_score = s
             best_block = block
@@ -263,29 +332,29 @@ def extract_bibliographic_title(reference_line: Optional[str]) -> Optional[str]:
     ln = normalize_text(normalize_text_for_doi_extraction(reference_line))
 
     # Remover URLs y DOI del texto para que no contaminen la extracción
-    ln = re.sub(r"https?://\S+", "", ln, flags=re.IGNORECASE)
-    ln = re.sub(r"\bdoi:\s*\S+", "", ln, flags=re.IGNORECASE)
-    ln = re.sub(r"\b10\.\d{4,9}(?:\.\d+)*\/\S+", "", ln, flags=re.IGNORECASE)
-    ln = re.sub(r"\s+", " ", ln).strip()
+    ln = _RE_URL.sub("", ln)
+    ln = _RE_DOI_PREFIXED.sub("", ln)
+    ln = _RE_DOI_BARE.sub("", ln)
+    ln = _RE_WS.sub(" ", ln).strip()
 
     # Fallback web común: "Título [Organización]. (n.d.). Retrieved from ..."
     # En este caso, el título suele estar ANTES del bracket.
-    if re.search(r"\(\s*n\.d\.\s*\)", ln, flags=re.IGNORECASE) and "[" in ln and "]" in ln:
+    if _RE_ND.search(ln) and "[" in ln and "]" in ln:
         before_bracket = ln.split("[", 1)[0].strip()
         if 8 <= len(before_bracket) <= 300:
             return before_bracket
 
     # Regla principal: título inicia después de ')' del año / n.d.
     # Acepta: (2018), (2018a), (2023b), (n.d.)
-    m = re.search(r"\(\s*((?:19|20)\d{2}[a-z]?|n\.d\.)\s*\)\s*", ln, flags=re.IGNORECASE)
+    m = _RE_YEAR_PAREN.search(ln)
     if m:
         rest = ln[m.end():].lstrip()
 
         # Saltar puntuación típica justo después del año: ").", ") ." etc.
-        rest = re.sub(r"^[\.\:\;\-–—\s]+", "", rest).strip()
+        rest = _RE_LEADING_PUNCT.sub("", rest).strip()
 
         # Cortes típicos: antes de "Retrieved from"
-        rest = re.split(r"\bRetrieved\s+from\b", rest, maxsplit=1, flags=re.IGNORECASE)[0].strip()
+        rest = _RE_RETRIEVED.split(rest, maxsplit=1)[0].strip()
 
         # Tomar hasta el primer punto "fuerte" (separador usual entre título y fuente)
         parts = [p.strip() for p in rest.split(".") if p.strip()]
@@ -300,7 +369,7 @@ def extract_bibliographic_title(reference_line: Optional[str]) -> Optional[str]:
 
     # Fallback adicional (si no hay año en paréntesis):
     # Caso 1: “Título” entre comillas
-    mq = re.search(r"[\"“”](.+?)[\"“”]", ln)
+    mq = _RE_QUOTED.search(ln)
     if mq:
         cand = mq.group(1).strip()
         if len(cand) >= 8:
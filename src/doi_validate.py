@@ -1,21 +1,102 @@
+import threading
 import time
-from typing import Dict, Tuple
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, MutableMapping, Optional, Tuple
 import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_POOL_SIZE = 32
+DEFAULT_CACHE_SIZE = 10_000
+
+_default_session: Optional[requests.Session] = None
+_default_session_lock = threading.Lock()
+
+
+class LRUCache(MutableMapping):
+    """
+    Dict acotado: al superar maxsize descarta la entrada usada hace más tiempo.
+    Protegido con lock porque validate_doi_http se llama desde varios hilos.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE):
+        self.maxsize = max(1, int(maxsize))
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getitem__(self, key: Hashable) -> Any:
+        with self._lock:
+            value = self._data[key]
+            self._data.move_to_end(key)
+            return value
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __delitem__(self, key: Hashable) -> None:
+        with self._lock:
+            del self._data[key]
+
+    def __contains__(self, key: object) -> bool:
+        with self._lock:
+            return key in self._data
+
+    def __iter__(self) -> Iterator[Hashable]:
+        with self._lock:
+            return iter(list(self._data))
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+_default_cache = LRUCache(DEFAULT_CACHE_SIZE)
+
+
+def make_doi_session(pool_size: int = 10) -> requests.Session:
+    """
+    Sesión compartida para doi.org (keep-alive), con un pool del tamaño de los workers.
+    Los reintentos se manejan en validate_doi_http, por eso max_retries=0.
+    """
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+    s = requests.Session()
+    s.mount("http://", adapter)
+    s.mount("https://", adapter)
+    return s
+
+
+def _get_default_session() -> requests.Session:
+    # Sesión de módulo (creada una vez) para llamadas sin session explícita
+    global _default_session
+    if _default_session is None:
+        with _default_session_lock:
+            if _default_session is None:
+                _default_session = make_doi_session(DEFAULT_POOL_SIZE)
+    return _default_session
 
 
 def validate_doi_http(
     doi: str,
     timeout: float,
     max_retries: int,
-    cache: Dict[str, Dict],
+    cache: Optional[MutableMapping[str, Dict]] = None,
+    session: Optional[requests.Session] = None,
 ) -> Tuple[str, bool, str, int, str, float]:
     """
     Returns: (doi, ok, category, status, message, response_time)
     category: valid | invalid | unknown
+    session: se reutilizan sus conexiones (evita un handshake TLS por DOI);
+             si es None se usa una sesión compartida del módulo.
+    cache: si es None se usa un LRUCache del módulo (DEFAULT_CACHE_SIZE entradas).
     """
+    if cache is None:
+        cache = _default_cache
     key = doi.lower()
-    if key in cache:
-        c = cache[key]
+    c = cache.get(key)
+    if c is not None:
         return doi, c["ok"], c["category"], c["status"], c["message"], c["time"]
 
     url = f"https://doi.org/{doi}"
@@ -25,6 +106,7 @@ def validate_doi_http(
         "Accept-Language": "en-US,en;q=0.7,es;q=0.5",
     }
 
+    http = session or _get_default_session()
     start = time.time()
 
     def store(ok: bool, cat: str, status: int, msg: str):
@@ -35,7 +117,7 @@ def validate_doi_http(
     for attempt in range(max_retries):
         try:
             # 1) HEAD primero (rápido)
-            r = requests.head(url, headers=headers, allow_redirects=True, timeout=timeout)
+            r = http.head(url, headers=headers, allow_redirects=True, timeout=timeout)
             status = r.status_code
 
             # 2) Fallback a GET cuando HEAD es "sospechoso" o inconcluso
@@ -45,10 +127,11 @@ def validate_doi_http(
             #   - 400: puede ser comportamiento raro; intentamos GET para confirmar
             #   - >=500: error servidor
             if status in (405, 403, 404, 400) or status >= 500:
-                r = requests.get(
+                r = http.get(
                     url, headers=headers, allow_redirects=True, timeout=timeout, stream=True
                 )
                 status = r.status_code
+                r.close()  # no se lee el cuerpo; libera la conexión al pool
 
             # 3) Interpretación final (ya con el status de la "mejor" prueba)
             if 200 <= status < 400:
@@ -97,3 +180,19 @@ def validate_doi_http(
 
     return store(False, "unknown", 0, "⚠️ Máximo de reintentos alcanzado")
 
+
+def validate_dois_http_batch(
+    dois: Iterable[str],
+    timeout: float,
+    max_retries: int,
+    cache: Optional[MutableMapping[str, Dict]] = None,
+    session: Optional[requests.Session] = None,
+    max_workers: int = 16,
+) -> List[Tuple[str, bool, str, int, str, float]]:
+    """
+    Valida varios DOIs en paralelo (la latencia de red domina, no la CPU).
+    Devuelve los resultados en el mismo orden de entrada.
+    """
+    http = session or _get_default_session()
+    with ThreadPoolExecutor(max_workers=max_workers) as ex:
+        return list(ex.map(lambda d: validate_doi_http(d, timeout, max_retries, cache, session=http), dois))
@@ -1,18 +1,52 @@
-from typing import Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import os
 import re
+import threading
 import unicodedata
 from difflib import SequenceMatcher
+from functools import lru_cache
 
 import requests
 
+# Optional: similitud en C++ (mucho más rápida que difflib)
+try:
+    from rapidfuzz import fuzz, process  # type: ignore
+except Exception:  # pragma: no cover
+    fuzz = None
+    process = None
+
+# Optional: caché en disco (sqlite) para respuestas de Crossref
+try:
+    from requests_cache import CachedSession  # type: ignore
+except Exception:  # pragma: no cover
+    CachedSession = None
+
+# DOI_VALIDATOR_CROSSREF_CACHE=0 desactiva la caché (p. ej. en CI)
+CROSSREF_CACHE_ENABLED = os.environ.get("DOI_VALIDATOR_CROSSREF_CACHE", "1").strip().lower() not in ("0", "false", "no", "off")
+CROSSREF_CACHE_PATH = os.environ.get("DOI_VALIDATOR_CROSSREF_CACHE_PATH", ".cache/crossref")
+CROSSREF_CACHE_EXPIRE_SEC = 7 * 24 * 3600
+
+_crossref_session: Optional[requests.Session] = None
+_crossref_session_lock = threading.Lock()
+
+
+# Marcas combinantes (diacríticos) que deja NFKD sobre letras latinas; se toman de sus
+# bloques Unicode con el mismo criterio que unicodedata.combining (p. ej. excluye U+034F)
+_COMBINING_BLOCKS = ((0x0300, 0x036F), (0x1AB0, 0x1AFF), (0x1DC0, 0x1DFF), (0x20D0, 0x20FF), (0xFE20, 0xFE2F))
+_COMBINING_RE = re.compile(
+    "[" + "".join(
+        re.escape(chr(c)) for lo, hi in _COMBINING_BLOCKS for c in range(lo, hi + 1) if unicodedata.combining(chr(c))
+    ) + "]+"
+)
+
 
 def _strip_accents(s: str) -> str:
     if not s:
         return ""
-    s = unicodedata.normalize("NFKD", s)
-    return "".join(ch for ch in s if not unicodedata.combining(ch))
+    return _COMBINING_RE.sub("", unicodedata.normalize("NFKD", s))
 
 
+@lru_cache(maxsize=4096)
 def normalize_title(t: str) -> str:
     t = (t or "").strip()
     t = _strip_accents(t).lower()
@@ -22,6 +56,18 @@ def normalize_title(t: str) -> str:
     return t
 
 
+def _blend_title_scores(a: str, b: str, seq: float) -> float:
+    # Jaccard por tokens (tolerante a reordenamientos). No se usa fuzz.token_set_ratio:
+    # da 1.0 cuando un título es subconjunto del otro y eso inflaría los "coincide".
+    ta = set(a.split())
+    tb = set(b.split())
+    jacc = (len(ta & tb) / max(1, len(ta | tb))) if (ta or tb) else 0.0
+
+    # Mezcla conservadora
+    score = max(seq, jacc, (seq + jacc) / 2.0)
+    return float(round(score, 4))
+
+
 def title_match_score(bibliographic_title: Optional[str], crossref_title: Optional[str]) -> Optional[float]:
     """
     Retorna un score 0-1 (más alto = más parecido).
@@ -34,18 +80,39 @@ def title_match_score(bibliographic_title: Optional[str], crossref_title: Option
     b = normalize_title(crossref_title)
     if not a or not b:
         return None
+    if a == b:
+        return 1.0
 
     # Similaridad por secuencia (tolerante a pequeñas diferencias)
-    seq = SequenceMatcher(None, a, b).ratio()
+    if fuzz is not None:
+        seq = fuzz.ratio(a, b) / 100.0
+    else:
+        seq = SequenceMatcher(None, a, b).ratio()
 
-    # Jaccard por tokens (tolerante a reordenamientos)
-    ta = set(a.split())
-    tb = set(b.split())
-    jacc = (len(ta & tb) / max(1, len(ta | tb))) if (ta or tb) else 0.0
+    return _blend_title_scores(a, b, seq)
 
-    # Mezcla conservadora
-    score = max(seq, jacc, (seq + jacc) / 2.0)
-    return float(round(score, 4))
+
+def title_match_scores(
+    bibliographic_titles: Sequence[Optional[str]], crossref_title: Optional[str]
+) -> List[Optional[float]]:
+    """
+    Igual que title_match_score(t, crossref_title) para cada t, pero con la parte de secuencia
+    calculada en una sola llamada a rapidfuzz.process.cdist (si está disponible).
+    """
+    b = normalize_title(crossref_title) if crossref_title else ""
+    if process is None or not b:
+        return [title_match_score(t, crossref_title) for t in bibliographic_titles]
+
+    normalized = [normalize_title(t) if t else "" for t in bibliographic_titles]
+    todo = [i for i, a in enumerate(normalized) if a]
+    out: List[Optional[float]] = [None] * len(normalized)
+    if not todo:
+        return out
+    ratios = process.cdist([b], [normalized[i] for i in todo], scorer=fuzz.ratio, dtype="float64")[0]
+    for i, r in zip(todo, ratios):
+        a = normalized[i]
+        out[i] = 1.0 if a == b else _blend_title_scores(a, b, float(r) / 100.0)
+    return out
 
 
 def title_match_label(score: Optional[float], threshold: float) -> str:
@@ -54,6 +121,33 @@ def title_match_label(score: Optional[float], threshold: float) -> str:
     return "match" if score >= threshold else "mismatch"
 
 
+def _get_crossref_session() -> requests.Session:
+    """
+    Sesión de módulo para api.crossref.org (creada una vez).
+    Con requests-cache instalado y la caché habilitada, las respuestas GET se guardan en sqlite
+    durante CROSSREF_CACHE_EXPIRE_SEC (solo 200: un DOI aún no indexado se vuelve a consultar);
+    al expirar se revalidan con ETag/Last-Modified.
+    """
+    global _crossref_session
+    if _crossref_session is None:
+        with _crossref_session_lock:
+            if _crossref_session is None:
+                s = None
+                if CROSSREF_CACHE_ENABLED and CachedSession is not None:
+                    try:
+                        s = CachedSession(
+                            CROSSREF_CACHE_PATH,
+                            backend="sqlite",
+                            expire_after=CROSSREF_CACHE_EXPIRE_SEC,
+                            allowable_methods=("GET",),
+                            allowable_codes=(200,),
+                        )
+                    except Exception:
+                        s = None
+                _crossref_session = s or requests.Session()
+    return _crossref_session
+
+
 def crossref_title_by_doi(doi: str, timeout: float = 15.0) -> Tuple[Optional[str], Optional[str]]:
     """
     Returns: (title, container_or_publisher)
@@ -61,7 +155,7 @@ def crossref_title_by_doi(doi: str, timeout: float = 15.0) -> Tuple[Optional[str
     url = f"https://api.crossref.org/works/{doi}"
     headers = {"User-Agent": "doi-validator/1.0 (mailto:example@example.com)"}
     try:
-        r = requests.get(url, headers=headers, timeout=timeout)
+        r = _get_crossref_session().get(url, headers=headers, timeout=timeout)
         if r.status_code != 200:
             return None, None
         data = r.json().get("message", {}) or {}
@@ -74,6 +168,50 @@ def crossref_title_by_doi(doi: str, timeout: float = 15.0) -> Tuple[Optional[str
         return None, None
 
 
+CROSSREF_BATCH_SIZE = 50
+
+
+def crossref_titles_for_dois(
+    dois: Iterable[str],
+    session: Optional[requests.Session] = None,
+    timeout: float = 15.0,
+) -> Dict[str, Tuple[Optional[str], Optional[str]]]:
+    """
+    Consulta títulos en lote: una petición /works?filter=doi:A,doi:B,... por cada CROSSREF_BATCH_SIZE DOIs.
+    Returns: {doi_en_minúsculas: (title, container_or_publisher)} solo para los DOIs encontrados;
+    los que falten se pueden consultar con crossref_title_by_doi.
+    """
+    http = session or _get_crossref_session()
+    url = "https://api.crossref.org/works"
+    headers = {"User-Agent": "doi-validator/1.0 (mailto:example@example.com)"}
+    # Una coma dentro del DOI rompería la sintaxis del filtro: esos van por la consulta individual
+    pending = [d for d in dict.fromkeys(dois) if d and "," not in d]
+    out: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+    for i in range(0, len(pending), CROSSREF_BATCH_SIZE):
+        chunk = pending[i:i + CROSSREF_BATCH_SIZE]
+        params = {
+            "filter": ",".join(f"doi:{d}" for d in chunk),
+            "rows": len(chunk),
+            "select": "DOI,title,container-title,publisher",
+        }
+        try:
+            r = http.get(url, params=params, headers=headers, timeout=timeout)
+            if r.status_code != 200:
+                continue
+            items = (r.json().get("message", {}) or {}).get("items", []) or []
+        except Exception:
+            continue
+        for item in items:
+            doi = (item.get("DOI") or "").lower()
+            if not doi:
+                continue
+            title_list = item.get("title") or []
+            title = title_list[0].strip() if title_list else None
+            container = (item.get("container-title") or [None])[0]
+            out[doi] = (title, container or item.get("publisher"))
+    return out
+
+
 def crossref_search_by_bibliographic(query: str, timeout: float = 15.0) -> Tuple[Optional[str], Optional[str], Optional[str]]:
     """
     Returns: (title, doi, container_or_publisher)
@@ -86,7 +224,7 @@ def crossref_search_by_bibliographic(query: str, timeout: float = 15.0) -> Tuple
     headers = {"User-Agent": "doi-validator/1.0 (mailto:example@example.com)"}
     params = {"query.bibliographic": q, "rows": 1}
     try:
-        r = requests.get(url, params=params, headers=headers, timeout=timeout)
+        r = _get_crossref_session().get(url, params=params, headers=headers, timeout=timeout)
         if r.status_code != 200:
             return None, None, None
         items = (r.json().get("message", {}) or {}).get("items", []) or []
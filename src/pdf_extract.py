@@ -2,6 +2,12 @@ import unicodedata
 from typing import List, Tuple
 import pdfplumber
 
+# Optional: PyMuPDF extrae texto plano mucho más rápido que pdfplumber
+try:
+    import pymupdf  # type: ignore
+except Exception:  # pragma: no cover
+    pymupdf = None
+
 
 def normalize_text(t: str) -> str:
     t = unicodedata.normalize("NFKC", t or "")
@@ -10,12 +16,35 @@ def normalize_text(t: str) -> str:
     return t
 
 
+def _rewind(pdf_file) -> None:
+    # Un stream ya leído (p. ej. un upload de Streamlit) debe volver al inicio antes de abrirlo
+    if hasattr(pdf_file, "seek"):
+        pdf_file.seek(0)
+
+
 def extract_text_pages(pdf_file) -> Tuple[List[str], str]:
     pages_text: List[str] = []
-    with pdfplumber.open(pdf_file) as pdf:
-        for page in pdf.pages:
-            pages_text.append(normalize_text(page.extract_text() or ""))
-    method = "pdfplumber"
+    method = ""
+    if pymupdf is not None:
+        try:
+            if hasattr(pdf_file, "read"):
+                _rewind(pdf_file)
+                doc = pymupdf.open(stream=pdf_file.read(), filetype="pdf")
+            else:
+                doc = pymupdf.open(pdf_file)
+            with doc:
+                for page in doc:
+                    pages_text.append(normalize_text(page.get_text("text") or ""))
+            method = "pymupdf"
+        except Exception:
+            pages_text = []  # PDF que PyMuPDF no abre: probar con pdfplumber
+    if not method:
+        _rewind(pdf_file)
+        with pdfplumber.open(pdf_file) as pdf:
+            for page in pdf.pages:
+                pages_text.append(normalize_text(page.extract_text() or ""))
+                page.flush_cache()
+        method = "pdfplumber"
     if len("".join(pages_text).strip()) < 120:
-        method = "pdfplumber (texto limitado; posible PDF escaneado)"
+        method = f"{method} (texto limitado; posible PDF escaneado)"
     return pages_text, method
@@ -2,67 +2,74 @@ import re
 from typing import Optional, Tuple, List
 from .pdf_extract import normalize_text
 
+# Límites de línea iguales a los de str.splitlines(); _HWS = espacio que no corta la línea.
+# Con esto los patrones equivalen a hacer .match(line.strip()) línea por línea,
+# pero se buscan con una sola pasada sobre el texto completo.
+_LB = r"\n\r\x0b\x0c\x1c-\x1e\x85\u2028\u2029"
+_HWS = rf"[^\S{_LB}]"
+_BOL = rf"(?<![^{_LB}])"
+_EOL = rf"(?![^{_LB}])"
+
 REF_START = re.compile(
-    r"""
-^\s*
-(?:\d+[\.\)]\s*)?
+    rf"""
+{_BOL}{_HWS}*
+(?:\d+[\.\)]{_HWS}*)?
 (?:references
 |bibliography
-|works\s+cited
-|literature\s+cited
+|works{_HWS}+cited
+|literature{_HWS}+cited
 |referencias
 |bibliograf[ií]a
-|referencias\s+bibliogr[aá]ficas
-|obras\s+citadas
-|literatura\s+citada
+|referencias{_HWS}+bibliogr[aá]ficas
+|obras{_HWS}+citadas
+|literatura{_HWS}+citada
 )
-\s*[:\-]?\s*$
+{_HWS}*[:\-]?{_HWS}*{_EOL}
 """,
     re.IGNORECASE | re.VERBOSE,
 )
 
 REF_END = re.compile(
-    r"""
-^\s*
-(?:\d+[\.\)]\s*)?
+    rf"""
+{_BOL}{_HWS}*
+(?:\d+[\.\)]{_HWS}*)?
 (?:appendix|ap[eé]ndice|annex|anexo
 |acknowledg(e)?ments|agradecimientos
-|supplementary|material\s+suplementario
+|supplementary|material{_HWS}+suplementario
 |funding|financiamiento
-|author\s+contributions|contribuci[oó]n\s+de\s+autores
-|conflict\s+of\s+interest|conflicto\s+de\s+inter[eé]s
+|author{_HWS}+contributions|contribuci[oó]n{_HWS}+de{_HWS}+autores
+|conflict{_HWS}+of{_HWS}+interest|conflicto{_HWS}+de{_HWS}+inter[eé]s
 )
-\s*[:\-]?\s*$
+{_HWS}*[:\-]?{_HWS}*{_EOL}
 """,
     re.IGNORECASE | re.VERBOSE,
 )
 
 
 def slice_references_section(full_text: str, min_lines_after: int = 12) -> Tuple[str, Optional[int], Optional[int]]:
-    lines = full_text.splitlines()
-    start = None
-    for i, line in enumerate(lines):
-        if REF_START.match(line.strip()):
-            start = i
-            break
-    if start is None:
+    m = REF_START.search(full_text)
+    if m is None:
         return full_text, None, None
 
-    end = len(lines)
-    for j in range(start + 1, len(lines)):
-        if REF_END.match(lines[j].strip()):
-            if (j - start) >= min_lines_after:
-                end = j
-                break
+    # Índices de línea (start/end) calculados solo sobre el tramo necesario
+    start = len(full_text[:m.start()].splitlines())
+    end_pos = len(full_text)
+    end = None
+    for n in REF_END.finditer(full_text, m.end()):
+        j = start + len(full_text[m.start():n.start()].splitlines())
+        if (j - start) >= min_lines_after:
+            end_pos, end = n.start(), j
+            break
 
-    ref_text = "\n".join(lines[start:end]).strip()
+    ref_lines = full_text[m.start():end_pos].splitlines()
+    if end is None:
+        end = start + len(ref_lines)
+    ref_text = "\n".join(ref_lines).strip()
     if len(ref_text) < 250:
         return full_text, None, None
     return ref_text, start, end
 
 
 def extract_reference_lines(ref_text: str) -> List[str]:
-    lines = [ln.strip() for ln in normalize_text(ref_text).splitlines()]
-    lines = [ln for ln in lines if len(ln) >= 35]
-    lines = [ln for ln in lines if not REF_START.match(ln)]
-    return lines
+    stripped = (ln.strip() for ln in normalize_text(ref_text).splitlines())
+    return [ln for ln in stripped if len(ln) >= 35 and not REF_START.match(ln)]
@@ -1,14 +1,14 @@
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Union
 import pandas as pd
 
 
-def to_dataframe(rows: List[Dict]) -> pd.DataFrame:
+def to_dataframe(rows: Union[List[Dict], pd.DataFrame]) -> pd.DataFrame:
     df = pd.DataFrame(rows)
-    if not df.empty:
+    if len(df) > 1:
         sort_cols = [c for c in ["Categoría", "Título match", "Código HTTP", "DOI"] if c in df.columns]
         if sort_cols:
-            df.sort_values(by=sort_cols, inplace=True, ignore_index=True)
+            df = df.sort_values(by=sort_cols, kind="stable", ignore_index=True)
     return df
 
 
@@ -36,15 +36,21 @@ def make_txt_report(df: pd.DataFrame) -> str:
         "-" * 72,
     ]
 
-    for _, r in df.iterrows():
+    has_cr_title = "Título (Crossref)" in df.columns
+    has_bib_title = "Título (Bibliografía)" in df.columns
+    has_match = "Título match" in df.columns
+    has_score = "Score título" in df.columns
+
+    # to_dict("records") evita armar una Series por fila (iterrows)
+    for r in df.to_dict("records"):
         extra = ""
-        if "Título (Crossref)" in df.columns and str(r.get("Título (Crossref)", "")).strip():
+        if has_cr_title and str(r.get("Título (Crossref)", "")).strip():
             extra += f" | Título(Crossref): {r.get('Título (Crossref)')}"
-        if "Título (Bibliografía)" in df.columns and str(r.get("Título (Bibliografía)", "")).strip():
+        if has_bib_title and str(r.get("Título (Bibliografía)", "")).strip():
             extra += f" | Título(Biblio): {r.get('Título (Bibliografía)')}"
-        if "Título match" in df.columns:
+        if has_match:
             extra += f" | TitleMatch={r.get('Título match')}"
-        if "Score título" in df.columns and str(r.get("Score título", "")).strip():
+        if has_score and str(r.get("Score título", "")).strip():
             extra += f" | Score={r.get('Score título')}"
 
         lines.append(f"{r.get('Estado','')} | {r.get('DOI','')} | HTTP={r.get('Código HTTP','')} | {r.get('Mensaje','')}{extra}")